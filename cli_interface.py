@@ -155,6 +155,13 @@ Exemplos de uso:
         help='Reconstrói o índice do zero'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Processos usados para criar o índice (padrão: número de CPUs)'
+    )
+    
     parser.add_argument(
         '--stats',
         action='store_true',
@@ -176,7 +183,7 @@ Exemplos de uso:
         # Reconstrói índice se solicitado
         if args.rebuild_index:
             print("🔄 Reconstruindo índice...")
-            engine.load_data(csv_path)
+            engine.load_data(csv_path, workers=args.workers)
             engine.save_index()
             print("✅ Índice reconstruído com sucesso!")
             return
@@ -184,7 +191,7 @@ Exemplos de uso:
         # Tenta carregar índice existente
         if not engine.load_index():
             print("📚 Criando novo índice...")
-            engine.load_data(csv_path)
+            engine.load_data(csv_path, workers=args.workers)
             engine.save_index()
             print("✅ Índice criado com sucesso!")
         else:
@@ -1,11 +1,12 @@
 from fastapi import FastAPI, Request, Query, HTTPException
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from typing import Optional
+from typing import Dict, Optional
+import asyncio
+import csv
 import os
 import sys
-import pandas as pd
 import io
 from pathlib import Path
 
@@ -36,6 +37,20 @@ if not search_engine.load_index():
     else:
         print(f"Arquivo CSV não encontrado: {csv_path}")
 
+# Buscas em andamento: chamadas concorrentes idênticas aguardam o mesmo resultado
+_inflight: Dict[tuple, asyncio.Future] = {}
+
+async def run_search(func, *args):
+    """Executa func(*args) do motor de busca numa thread, sem duplicar execuções simultâneas"""
+    key = (func.__name__, *args)
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: um cliente que desconecta não cancela a busca dos demais
+    return await asyncio.shield(future)
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     """Página principal do buscador web"""
@@ -72,15 +87,16 @@ async def search(
         }
     
     try:
-        # Busca todos os resultados para calcular o total
-        all_results = search_engine.search(query, max_results=10000)
-        total_results = len(all_results)
+        # A busca é síncrona e pesada: roda fora do event loop
+        # O total só precisa da busca booleana, sem pontuação nem snippets
+        total_results = await run_search(search_engine.count, query)
         total_pages = (total_results + per_page - 1) // per_page
         
-        # Calcula índices para paginação
+        # Calcula índices para paginação e busca só até o fim da página pedida
         start_idx = (page - 1) * per_page
         end_idx = start_idx + per_page
-        page_results = all_results[start_idx:end_idx]
+        top_results = await run_search(search_engine.search, query, end_idx)
+        page_results = top_results[start_idx:end_idx]
         
         # Converte resultados para formato JSON
         results_json = []
@@ -128,37 +144,31 @@ async def download_csv(q: str = Query(..., description="Termo de busca")):
         raise HTTPException(status_code=400, detail="Query não fornecida")
     
     try:
-        # Busca TODOS os resultados (sem limite)
-        results = search_engine.search(query, max_results=10000)
+        # Busca TODOS os resultados (sem limite), fora do event loop
+        results = await run_search(search_engine.search, query, 10000)
         
         if not results:
             raise HTTPException(status_code=404, detail="Nenhum resultado encontrado")
         
-        # Converte resultados para DataFrame
-        data = []
-        for result in results:
-            data.append({
-                'Título': result.titulo,
-                'Data de Publicação': result.data_publicacao,
-                'Link': result.link,
-                'Score': result.score,
-                'Trecho': result.snippet
-            })
-        
-        df = pd.DataFrame(data)
-        
-        # Cria CSV em memória
-        output = io.StringIO()
-        df.to_csv(output, index=False, encoding='utf-8-sig')
-        output.seek(0)
+        def csv_rows():
+            """Gera o CSV linha a linha, direto dos resultados"""
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            yield '\ufeff'  # BOM para o Excel reconhecer UTF-8
+            writer.writerow(['Título', 'Data de Publicação', 'Link', 'Score', 'Trecho'])
+            for result in results:
+                writer.writerow([result.titulo, result.data_publicacao, result.link, result.score, result.snippet])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
         
         # Nome do arquivo baseado na query
         safe_query = "".join(c for c in query if c.isalnum() or c in (' ', '_')).strip()[:30]
         safe_query = safe_query.replace(' ', '_')
         filename = f"resultados_busca_{safe_query}.csv"
         
-        return Response(
-            content=output.getvalue(),
+        return StreamingResponse(
+            csv_rows(),
             media_type='text/csv',
             headers={
                 'Content-Disposition': f'attachment; filename="{filename}"',
@@ -1,14 +1,337 @@
+import numpy as np
 import pandas as pd
 import re
 import pickle
 import os
-from typing import List, Dict, Set, Tuple
+import json
+import string
+from typing import List, Dict, Iterator, Optional, Tuple
 from dataclasses import dataclass
-from collections import defaultdict
+from collections import Counter, defaultdict
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 import unicodedata
 
+try:
+    import numba
+except ImportError:  # numba é opcional; sem ele a pontuação usa NumPy puro
+    numba = None
 
-@dataclass
+
+def _combining_marks() -> List[int]:
+    """Codepoints das marcas combinantes (acentos decompostos) do BMP"""
+    return [c for c in range(0x10000) if unicodedata.combining(chr(c))]
+
+
+def _build_fold_variants() -> Dict[str, str]:
+    """Mapeia cada caractere [a-z0-9] para os caracteres que se normalizam nele (á, Á, ã...)"""
+    variants = defaultdict(list)
+    for codepoint in range(0x3000):
+        char = chr(codepoint)
+        folded = _COMBINING_RE.sub('', unicodedata.normalize('NFKD', char.lower()))
+        if len(folded) == 1 and folded in string.ascii_lowercase + string.digits:
+            variants[folded].append(re.escape(char))
+    return {base: ''.join(chars) for base, chars in variants.items()}
+
+
+_COMBINING_MARKS = _combining_marks()
+_COMBINING_CLASS = '[' + ''.join(re.escape(chr(c)) for c in _COMBINING_MARKS) + ']'
+_COMBINING_RE = re.compile(_COMBINING_CLASS + '+')
+_FOLD_VARIANTS = _build_fold_variants()
+# Caracteres que fazem parte de uma palavra no texto original
+_WORD_CLASS = '[' + ''.join(_FOLD_VARIANTS.values()) + _COMBINING_CLASS[1:]
+_WORD_RE = re.compile(_WORD_CLASS + '+')
+# Mantém apenas [a-z0-9]; qualquer outro byte (inclusive o '?' dos não ASCII) vira espaço
+_ALNUM_BYTES = bytes(c if chr(c) in string.ascii_lowercase + string.digits else 0x20 for c in range(256))
+# Fora do BMP (raro): as marcas combinantes não estão em _COMBINING_RE
+_ASTRAL_RE = re.compile('[\U00010000-\U0010ffff]')
+
+_STOPWORDS = frozenset({
+    'a', 'o', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'para', 'por', 'com', 'no', 'na',
+    'nos', 'nas', 'um', 'uma', 'uns', 'umas', 'se', 'que', 'quando', 'onde', 'como', 'mais',
+    'muito', 'mas', 'ou', 'pelo', 'pela', 'pelos', 'pelas', 'ao', 'aos', 'às', 'ser', 'estar',
+    'ter', 'haver', 'seu', 'sua', 'seus', 'suas', 'meu', 'minha', 'meus', 'minhas', 'nosso',
+    'nossa', 'nossos', 'nossas', 'ele', 'ela', 'eles', 'elas', 'este', 'esta', 'estes',
+    'estas', 'esse', 'essa', 'esses', 'essas', 'aquele', 'aquela', 'aqueles', 'aquelas',
+    'foi', 'é', 'são', 'foram', 'sendo', 'sido'
+})
+
+
+def _gather_slices(offsets: np.ndarray, doc_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Posições planas das fatias [offsets[d], offsets[d + 1]) dos documentos, e o dono de cada uma"""
+    starts = offsets[doc_ids]
+    lengths = offsets[doc_ids + 1] - starts
+    # Início da fatia de cada documento menos onde ela começa no resultado concatenado
+    shifts = starts - (np.cumsum(lengths) - lengths)
+    positions = np.repeat(shifts, lengths) + np.arange(lengths.sum())
+    return positions, np.repeat(np.arange(len(doc_ids)), lengths)
+
+
+def _score_batch_numpy(doc_ids, tf_offsets, tf_ids, tf_counts, title_offsets, title_flat, query_ids, out_scores):
+    """Pontua documentos somando, por token da consulta, 3.0 se está no título e 1.0 por ocorrência no texto"""
+    # Peso de cada token = quantas vezes aparece na consulta; só as fatias dos candidatos são lidas
+    query_unique, query_weights = np.unique(query_ids[query_ids >= 0], return_counts=True)
+    out_scores[:] = 0.0
+    if not len(query_unique):
+        return
+
+    def weigh(ids):
+        found = np.minimum(np.searchsorted(query_unique, ids), len(query_unique) - 1)
+        return np.where(query_unique[found] == ids, query_weights[found], 0)
+
+    positions, owners = _gather_slices(tf_offsets, doc_ids)
+    out_scores += np.bincount(owners, weights=weigh(tf_ids[positions]) * tf_counts[positions],
+                              minlength=len(doc_ids))
+    # Os tokens do título são únicos por documento: a soma dos pesos equivale a testar presença
+    positions, owners = _gather_slices(title_offsets, doc_ids)
+    out_scores += 3.0 * np.bincount(owners, weights=weigh(title_flat[positions]), minlength=len(doc_ids))
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _score_batch(doc_ids, tf_offsets, tf_ids, tf_counts, title_offsets, title_flat, query_ids, out_scores):
+        """Mesma pontuação de `_score_batch_numpy`, compilada (serial: são poucas centenas de candidatos,
+        e o kernel paralelo não é seguro com threads nem com fork)"""
+        for i in range(doc_ids.shape[0]):
+            doc = doc_ids[i]
+            titles = title_flat[title_offsets[doc]:title_offsets[doc + 1]]
+            ids = tf_ids[tf_offsets[doc]:tf_offsets[doc + 1]]
+            counts = tf_counts[tf_offsets[doc]:tf_offsets[doc + 1]]
+            score = 0.0
+            # Tokens do título e da tabela de frequência estão ordenados: busca binária por termo
+            for j in range(query_ids.shape[0]):
+                k = np.searchsorted(titles, query_ids[j])
+                if k < titles.shape[0] and titles[k] == query_ids[j]:
+                    score += 3.0
+                k = np.searchsorted(ids, query_ids[j])
+                if k < ids.shape[0] and ids[k] == query_ids[j]:
+                    score += counts[k]
+            out_scores[i] = score
+else:
+    _score_batch = _score_batch_numpy
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _fold_utf8(data, alnum, combining, out):
+        """Em uma passada sobre o UTF-8 de um texto já em NFKD: descarta marcas combinantes,
+        troca o resto fora de [a-z0-9] por espaço e colapsa os espaços. Retorna o tamanho
+        escrito em out, ou -1 se encontrar caractere fora do BMP"""
+        size = 0
+        space = False
+        i = 0
+        while i < data.shape[0]:
+            byte = data[i]
+            if byte < 0x80:
+                char = alnum[byte]
+                i += 1
+                if char == 0x20:
+                    space = True
+                    continue
+                if space and size:
+                    out[size] = 0x20
+                    size += 1
+                space = False
+                out[size] = char
+                size += 1
+                continue
+            if byte >= 0xF0:
+                return -1
+            if byte >= 0xE0:
+                codepoint = ((byte & 0x0F) << 12) | ((data[i + 1] & 0x3F) << 6) | (data[i + 2] & 0x3F)
+                i += 3
+            else:
+                codepoint = ((byte & 0x1F) << 6) | (data[i + 1] & 0x3F)
+                i += 2
+            if not combining[codepoint]:
+                space = True  # não ASCII que sobra vira espaço, como o '?' do encode('ascii', 'replace')
+        return size
+
+    _ALNUM_TABLE = np.frombuffer(_ALNUM_BYTES, dtype=np.uint8)
+    _COMBINING_TABLE = np.zeros(0x10000, dtype=np.bool_)
+    _COMBINING_TABLE[_COMBINING_MARKS] = True
+else:
+    _fold_utf8 = None
+
+# Abaixo disso a chamada ao kernel numba custa mais que o caminho com regex
+_FOLD_MIN_LENGTH = 256
+
+
+_EMPTY_POSTINGS = np.empty(0, dtype=np.int32)
+# A partir desta razão entre os tamanhos de dois postings, a busca binária do menor
+# no maior supera o merge por ordenação do NumPy
+_SKEW_RATIO = 16
+
+# Sintaxe das queries booleanas
+# Tokens da consulta: frase entre aspas, parêntese ou palavra (termo ou operador)
+_QUERY_TOKEN_RE = re.compile(r'"([^"]+)"|([()])|([^\s()]+)')
+_PRECEDENCE = {'OR': 1, 'AND': 2, 'NOT': 3}
+# Tokens de texto normalizado: só [a-z0-9], com pelo menos 3 caracteres
+_TOKEN_RE = re.compile(r'[a-z0-9]{3,}')
+
+
+def _tokenize_query(query: str) -> List[Tuple[str, str]]:
+    """Divide a query em tokens (tipo, valor): 'TERM', 'PHRASE', '(', ')', 'AND', 'OR' e 'NOT'"""
+    raw = []
+    depth = 0
+    for phrase, paren, word in _QUERY_TOKEN_RE.findall(query):
+        if phrase:
+            raw.append(('PHRASE', phrase))
+        elif paren:
+            if paren == ')' and not depth:
+                continue  # ')' sem abertura é ignorado
+            depth += 1 if paren == '(' else -1
+            raw.append((paren, paren))
+        else:
+            raw.append((word if word in _PRECEDENCE else 'TERM', word))
+
+    operator_ors = set()  # posições (em raw) dos OR usados como operador
+
+    def is_operator_or(position: int) -> bool:
+        # OR só é operador entre dois tokens do mesmo grupo, e não logo após outro OR
+        previous = raw[position - 1][0] if position else None
+        following = raw[position + 1][0] if position + 1 < len(raw) else None
+        return (previous not in (None, '(') and following not in (None, ')')
+                and position - 1 not in operator_ors)
+
+    tokens = []
+    position = 0
+    while position < len(raw):
+        kind, value = raw[position]
+        following = raw[position + 1][0] if position + 1 < len(raw) else None
+        if kind == 'NOT':
+            if following in ('AND', 'NOT') or (following == 'OR' and not is_operator_or(position + 1)):
+                # NOT nega o token seguinte, mesmo que ele seja um operador
+                tokens += [('NOT', value), ('TERM', raw[position + 1][1])]
+                position += 2
+                continue
+            if following in (None, 'OR', ')'):
+                kind = 'TERM'  # NOT sem operando é tratado como termo comum
+        elif kind == 'OR':
+            if is_operator_or(position):
+                operator_ors.add(position)
+            else:
+                kind = 'TERM'
+        tokens.append((kind, value))
+        position += 1
+    return tokens
+
+
+def _to_rpn(tokens: List[Tuple[str, str]]) -> Optional[List[Tuple[str, str]]]:
+    """Converte os tokens para notação pós-fixa (shunting-yard), com AND implícito entre operandos.
+
+    Operandos ausentes (ex.: "saude OR AND") viram 'EMPTY'. Retorna None se houver
+    parênteses vazios ou sem fechamento.
+    """
+    output = []
+    operators = []
+    expect_operand = True
+    last = None
+    for kind, value in tokens:
+        if kind == 'AND':
+            pass  # AND explícito só separa operandos; o implícito é inserido abaixo
+        elif kind in ('TERM', 'PHRASE', '(', 'NOT'):
+            if not expect_operand:
+                output += _pop_operators(operators, _PRECEDENCE['AND'])
+                operators.append('AND')
+            if kind in ('TERM', 'PHRASE'):
+                output.append((kind, value))
+                expect_operand = False
+            else:
+                operators.append(kind)  # NOT é unário e prefixo: não desempilha nada
+                expect_operand = True
+        elif kind == ')':
+            if last == '(':
+                return None
+            if expect_operand:
+                output.append(('EMPTY', ''))
+            while operators[-1] != '(':
+                output.append((operators.pop(), ''))
+            operators.pop()
+            output.append(('GROUP', ''))
+            expect_operand = False
+        else:
+            if expect_operand:
+                output.append(('EMPTY', ''))
+            output += _pop_operators(operators, _PRECEDENCE[kind])
+            operators.append(kind)
+            expect_operand = True
+        last = kind
+    if '(' in operators:
+        return None
+    if expect_operand and operators:
+        output.append(('EMPTY', ''))
+    return output + [(operator, '') for operator in reversed(operators)]
+
+
+def _pop_operators(operators: List[str], precedence: int) -> List[Tuple[str, str]]:
+    """Desempilha os operadores de precedência maior ou igual (associatividade à esquerda)"""
+    popped = []
+    while operators and operators[-1] != '(' and _PRECEDENCE[operators[-1]] >= precedence:
+        popped.append((operators.pop(), ''))
+    return popped
+
+
+def _members(values: np.ndarray, postings: np.ndarray) -> np.ndarray:
+    """Máscara de quais valores (ordenados) estão nos postings, por busca binária"""
+    positions = np.searchsorted(postings, values)
+    positions[positions == len(postings)] = 0
+    return postings[positions] == values
+
+
+def _intersect_postings(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Interseção de dois postings ordenados e sem repetição"""
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    if len(a) * _SKEW_RATIO <= len(b):
+        # Posting curto contra um longo: busca binária em O(a log b), sem ordenar nada
+        return a[_members(a, b)]
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+def _subtract_postings(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Documentos de a que não estão em b (ambos ordenados e sem repetição)"""
+    if not len(a) or not len(b):
+        return a
+    if len(a) * _SKEW_RATIO <= len(b):
+        return a[~_members(a, b)]
+    return np.setdiff1d(a, b, assume_unique=True)
+
+
+def _union_postings(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """União de dois postings ordenados e sem repetição"""
+    if not len(a) or not len(b):
+        return b if not len(a) else a
+    # O sort estável (timsort) só intercala as duas sequências já ordenadas, em tempo linear;
+    # np.union1d passa por np.unique, bem mais lento
+    merged = np.concatenate((a, b))
+    merged.sort(kind='stable')
+    keep = np.empty(len(merged), dtype=bool)
+    keep[0] = True
+    np.not_equal(merged[1:], merged[:-1], out=keep[1:])
+    return merged[keep]
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Posições dos k maiores scores em ordem decrescente (empates pela posição)"""
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        # Seleção em O(n); inclui todos os empatados com o k-ésimo para manter a ordem total
+        threshold = np.partition(scores, n - k)[n - k]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+
+@dataclass(frozen=True)
 class SearchResult:
     id: int
     titulo: str
@@ -22,51 +345,90 @@ class TextProcessor:
     """Processa textos para indexação e busca"""
     
     def __init__(self):
-        self.stopwords = {
-            'a', 'o', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'para', 'por', 'com', 'no', 'na',
-            'nos', 'nas', 'um', 'uma', 'uns', 'umas', 'se', 'que', 'quando', 'onde', 'como', 'mais',
-            'muito', 'mas', 'ou', 'pelo', 'pela', 'pelos', 'pelas', 'ao', 'aos', 'às', 'ser', 'estar',
-            'ter', 'haver', 'seu', 'sua', 'seus', 'suas', 'meu', 'minha', 'meus', 'minhas', 'nosso',
-            'nossa', 'nossos', 'nossas', 'ele', 'ela', 'eles', 'elas', 'este', 'esta', 'estes',
-            'estas', 'esse', 'essa', 'esses', 'essas', 'aquele', 'aquela', 'aqueles', 'aquelas',
-            'foi', 'é', 'são', 'foram', 'sendo', 'sido'
-        }
+        self.stopwords = _STOPWORDS
     
-    def normalize_text(self, text: str) -> str:
+    @staticmethod
+    def normalize_text(text: str) -> str:
         """Normaliza texto removendo acentos e caracteres especiais"""
         if pd.isna(text):
             return ""
         
-        text = str(text).lower()
-        text = unicodedata.normalize('NFKD', text)
-        text = ''.join(c for c in text if not unicodedata.combining(c))
-        text = re.sub(r'[^a-z0-9\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+        text = unicodedata.normalize('NFKD', str(text).lower())
+        if _fold_utf8 is not None and len(text) >= _FOLD_MIN_LENGTH and not text.isascii():
+            # surrogatepass: surrogates soltos viram 3 bytes e, como qualquer não ASCII, espaço
+            data = np.frombuffer(text.encode('utf-8', 'surrogatepass'), dtype=np.uint8)
+            out = np.empty(len(data), dtype=np.uint8)
+            size = _fold_utf8(data, _ALNUM_TABLE, _COMBINING_TABLE, out)
+            if size >= 0:
+                return out[:size].tobytes().decode('ascii')
+        if not text.isascii():
+            if _ASTRAL_RE.search(text):
+                text = ''.join(c for c in text if not unicodedata.combining(c))
+            else:
+                text = _COMBINING_RE.sub('', text)
+        data = text.encode('ascii', 'replace').translate(_ALNUM_BYTES)
+        return b' '.join(data.split()).decode('ascii')
     
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def normalize_term(term: str) -> str:
+        """Normaliza um termo da consulta (com cache: os termos se repetem entre buscas)"""
+        return TextProcessor.normalize_text(term)
+
     def tokenize(self, text: str) -> List[str]:
         """Tokeniza texto em palavras"""
-        normalized = self.normalize_text(text)
-        tokens = normalized.split()
-        return [token for token in tokens if len(token) > 2 and token not in self.stopwords]
+        return self.tokenize_normalized(self.normalize_text(text))
+
+    def tokenize_normalized(self, normalized: str) -> List[str]:
+        """Tokeniza texto já passado por `normalize_text`"""
+        return list(self.iter_tokens(normalized))
+
+    def iter_tokens(self, normalized: str) -> Iterator[str]:
+        """Gera os tokens de texto já normalizado, sem montar lista intermediária"""
+        # Lookup direto no frozenset: um pré-filtro por bitmap de hash mediu ~50% mais lento
+        stopwords = self.stopwords
+        return (token for token in _TOKEN_RE.findall(normalized) if token not in stopwords)
     
     def extract_snippet(self, text: str, query_terms: List[str], max_length: int = 200) -> str:
         """Extrai snippet relevante do texto"""
         if not query_terms or pd.isna(text):
             return text[:max_length] + "..." if len(str(text)) > max_length else str(text)
         
-        text_lower = text.lower()
+        # Peso de cada termo distinto, na ordem de `terms` (repetidos contam mais)
+        weights = list(Counter(query_terms).values())
+        terms = {term: position for position, term in enumerate(dict.fromkeys(query_terms))}
+        # Uma passada pelas palavras do texto original, cada uma normalizada e procurada nos
+        # termos: o custo não cresce com o tamanho da consulta
+        matches = []
+        for m in _WORD_RE.finditer(text):
+            word = m.group()
+            term = terms.get(word.lower() if word.isascii() else self.normalize_term(word))
+            if term is not None:
+                matches.append((m.start(), m.end(), term))
+        
+        # Janela deslizante sobre as ocorrências: encontra o trecho de max_length
+        # caracteres que cobre mais termos distintos da busca
         best_position = 0
         max_matches = 0
-        
-        # Encontra a posição com mais termos de busca próximos
-        for i in range(0, len(text) - max_length, 20):
-            snippet_text = text[i:i + max_length]
-            snippet_tokens = set(self.tokenize(snippet_text))
-            matches = sum(1 for term in query_terms if term.lower() in snippet_tokens)
-            if matches > max_matches:
-                max_matches = matches
-                best_position = i
+        counts = [0] * len(weights)
+        window_matches = 0
+        right = 0
+        for left, (start, _, term) in enumerate(matches):
+            while right < len(matches) and matches[right][1] <= start + max_length:
+                if counts[matches[right][2]] == 0:
+                    window_matches += weights[matches[right][2]]
+                counts[matches[right][2]] += 1
+                right += 1
+            if window_matches > max_matches:
+                max_matches = window_matches
+                best_position = start
+            # A ocorrência da esquerda sai da janela
+            if right > left:
+                counts[term] -= 1
+                if counts[term] == 0:
+                    window_matches -= weights[term]
+        # Mantém a janela inteira dentro do texto
+        best_position = max(0, min(best_position, len(text) - max_length))
         
         snippet = text[best_position:best_position + max_length]
         if best_position > 0:
@@ -77,177 +439,436 @@ class TextProcessor:
         return snippet
 
 
+def _normalize_chunk(fields: List[Tuple]) -> List[Tuple[str, str]]:
+    """Normaliza pares (título, texto) num processo separado (usado por `bulk_add`)"""
+    processor = TextProcessor()
+    return [(processor.normalize_text(title), processor.normalize_text(text)) for title, text in fields]
+
+
+@contextmanager
+def _replacing(path: str, mode: str = 'wb', encoding: str = None):
+    """Abre um arquivo temporário ao lado de `path` e, ao fechar, o troca pelo destino (os.replace).
+
+    Processos que mapeiam o arquivo antigo continuam lendo o conteúdo antigo: ele nunca é truncado.
+    """
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, mode, encoding=encoding) as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _map_array(path: str, dtype) -> np.ndarray:
+    """Mapeia um arquivo binário em memória (somente leitura) como array de `dtype`"""
+    if not os.path.getsize(path):
+        return np.empty(0, dtype=dtype)  # np.memmap não aceita arquivo vazio
+    return np.memmap(path, dtype=dtype, mode='r')
+
+
+class MappedPostings(Mapping):
+    """Postings lidos sob demanda de um arquivo int32 mapeado em memória (termo -> array)"""
+
+    def __init__(self, postings: np.ndarray, terms: Dict[str, List[int]]):
+        self.postings = postings  # todos os postings concatenados
+        self.terms = terms  # termo -> [offset, tamanho]
+
+    def __getitem__(self, term: str) -> np.ndarray:
+        offset, length = self.terms[term]
+        return self.postings[offset:offset + length]
+
+    def __contains__(self, term) -> bool:
+        return term in self.terms
+
+    def __iter__(self):
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+
 class InvertedIndex:
     """Índice invertido para busca eficiente"""
+
+    VERSION = 4  # versão do formato salvo em pickle
     
     def __init__(self):
-        self.index = defaultdict(set)  # termo -> set de document_ids
+        self.version = self.VERSION
+        # termo -> np.ndarray ordenado de document_ids (int32: mesmo tamanho que uint32 e
+        # compatível com os postings.i32 já salvos; ids de documento cabem com folga)
+        self.index = {}
+        self._pending_docs = []  # documentos adicionados desde o último freeze()
         self.documents = {}  # document_id -> documento
         self.processor = TextProcessor()
+        self.vocab = {}  # token -> id inteiro
+        self.doc_tokens = {}  # document_id -> ids dos tokens do texto, em ordem
+        self.doc_title_tokens = {}  # document_id -> ids únicos dos tokens do título
+        self.norm_titles = []  # document_id -> título normalizado
+        self._packed = None
+        self._title_sequences = {}  # document_id -> ids dos tokens do título, em ordem (sob demanda)
+
+    def __getstate__(self):
+        self.freeze()
+        state = self.__dict__.copy()
+        state['_packed'] = None
+        state['_title_sequences'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.pop('_pending', None)  # buffer de postings das versões 3 e 4
+        self.__dict__.pop('norm_texts', None)  # textos normalizados da versão 4, sem uso
+        self._pending_docs = state.get('_pending_docs', [])
+        self._title_sequences = {}
+        version = state.get('version', 1)
+        if version < 3:
+            # Postings antigos eram sets de ids
+            self.index = {term: np.array(sorted(ids), dtype=np.int32) for term, ids in self.index.items()}
+        if version < 4:
+            # Índices antigos não guardam os títulos normalizados (nem, antes da v2,
+            # os tokens codificados): reconstrói a partir dos documentos
+            self.norm_titles = []
+            if version < 2:
+                self.vocab, self.doc_tokens, self.doc_title_tokens = {}, {}, {}
+            for doc_id, document in self.documents.items():
+                normalized = self._normalize_document(doc_id, document)
+                if version < 2:
+                    self._encode_document(doc_id, *normalized)
+        self.version = self.VERSION
+        self._packed = None
     
     def add_document(self, doc_id: int, document: Dict):
         """Adiciona documento ao índice"""
         self.documents[doc_id] = document
-        
-        # Indexa título com peso maior
-        if 'titulo' in document:
-            title_tokens = self.processor.tokenize(document['titulo'])
-            for token in title_tokens:
-                self.index[token].add(doc_id)
-                self.index[f"title:{token}"].add(doc_id)  # tokens do título com prefixo
-        
-        # Indexa texto do PDF
-        if 'texto' in document and not pd.isna(document['texto']):
-            text_tokens = self.processor.tokenize(document['texto'])
-            for token in text_tokens:
-                self.index[token].add(doc_id)
+        self._encode_document(doc_id, *self._normalize_document(doc_id, document))
+        # Os postings são montados a partir dos tokens codificados no freeze()
+        self._pending_docs.append(doc_id)
+
+    def bulk_add(self, df: pd.DataFrame, workers: int = 1):
+        """Adiciona todas as linhas do DataFrame (doc_id = índice) e monta os postings de uma vez"""
+        doc_ids = df.index.tolist()
+        records = df.to_dict('records')
+        # Normaliza por coluna, sem passar pelos dicts de cada linha
+        missing = [None] * len(df)
+        titles = df['titulo'].tolist() if 'titulo' in df else missing
+        texts = df['texto'].tolist() if 'texto' in df else missing
+        if workers > 1 and len(df) > 1:
+            # A normalização (unicode/regex) roda em paralelo; o vocabulário e os
+            # postings são montados aqui, em ordem, para que os ids sejam determinísticos
+            fields = list(zip(titles, texts))
+            size = -(-len(fields) // (workers * 4))
+            chunks = [fields[i:i + size] for i in range(0, len(fields), size)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                normalized = [pair for chunk in executor.map(_normalize_chunk, chunks) for pair in chunk]
+        else:
+            normalize = self.processor.normalize_text
+            normalized = zip([normalize(title) for title in titles], [normalize(text) for text in texts])
+
+        for doc_id, document, (norm_title, norm_text) in zip(doc_ids, records, normalized):
+            self.documents[doc_id] = document
+            self._store_title(doc_id, norm_title)
+            self._encode_document(doc_id, norm_title, norm_text)
+            self._pending_docs.append(doc_id)
+        self.freeze()
+
+    def _normalize_fields(self, document: Dict) -> Tuple[str, str]:
+        """Normaliza título e texto do PDF do documento"""
+        return (self.processor.normalize_text(document.get('titulo')),
+                self.processor.normalize_text(document.get('texto')))
+
+    def _normalize_document(self, doc_id: int, document: Dict) -> Tuple[str, str]:
+        """Normaliza título e texto do PDF uma única vez, guardando o título e retornando os dois"""
+        norm_title, norm_text = self._normalize_fields(document)
+        self._store_title(doc_id, norm_title)
+        return norm_title, norm_text
+
+    def _store_title(self, doc_id: int, norm_title: str):
+        """Guarda o título normalizado na posição doc_id (usado na verificação de frases)"""
+        missing = doc_id + 1 - len(self.norm_titles)
+        if missing > 0:
+            self.norm_titles.extend([''] * missing)
+        self.norm_titles[doc_id] = norm_title
+
+    def _encode_document(self, doc_id: int, norm_title: str, norm_text: str):
+        """Guarda os tokens do documento como arrays de ids inteiros para a pontuação"""
+        # Postings duplicados no mesmo documento são descartados no freeze()
+        self.doc_title_tokens[doc_id] = np.unique(self._token_ids(norm_title))
+        self.doc_tokens[doc_id] = self._token_ids(norm_text)
+        self._title_sequences.pop(doc_id, None)
+        self._packed = None
+
+    def _token_ids(self, normalized: str) -> np.ndarray:
+        """Tokeniza texto normalizado direto em ids, registrando os novos no vocabulário"""
+        vocab = self.vocab
+        return np.fromiter((vocab.setdefault(t, len(vocab)) for t in self.processor.iter_tokens(normalized)),
+                           dtype=np.int32)
+
+    def _pack_tokens(self) -> Tuple[np.ndarray, ...]:
+        """Tabela de frequências do texto e tokens do título de todos os documentos (offsets indexados por doc_id)"""
+        if self._packed is None:
+            size = max(self.documents) + 1 if self.documents else 0
+            packed = []
+            for arrays in (self.doc_tokens, self.doc_title_tokens):
+                lengths = np.zeros(size + 1, dtype=np.int64)
+                for doc_id, arr in arrays.items():
+                    lengths[doc_id + 1] = len(arr)
+                chunks = [arrays[doc_id] for doc_id in sorted(arrays)]
+                flat = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+                packed.extend([np.cumsum(lengths), flat])
+            self._packed = (*self._term_frequencies(*packed[:2]), *packed[2:])
+        return self._packed
+
+    @staticmethod
+    def _term_frequencies(offsets: np.ndarray, flat: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Converte tokens concatenados em (offsets, ids únicos ordenados, contagens) por documento"""
+        docs = np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+        pairs, counts = np.unique((docs << 32) | flat.astype(np.int64), return_counts=True)
+        tf_offsets = np.searchsorted(pairs >> 32, np.arange(len(offsets)), side='left')
+        return tf_offsets, (pairs & 0xFFFFFFFF).astype(np.int32), counts.astype(np.float64)
+
+    def freeze(self):
+        """Monta os postings (arrays int32 ordenados) dos documentos adicionados desde o último freeze"""
+        if not self._pending_docs:
+            return
+        if not isinstance(self.index, dict):
+            self.index = dict(self.index.items())  # postings mapeados são somente leitura
+        doc_ids = self._pending_docs
+        terms = list(self.vocab)  # id -> token
+        titles = [self.doc_title_tokens[doc_id] for doc_id in doc_ids]
+        texts = [self.doc_tokens[doc_id] for doc_id in doc_ids]
+
+        # Título e texto indexam o termo puro; o título também indexa "title:termo"
+        for prefix, arrays, owners in (('', titles + texts, doc_ids + doc_ids), ('title:', titles, doc_ids)):
+            for token_id, postings in zip(*self._group_postings(arrays, owners)):
+                term = prefix + terms[token_id]
+                if term in self.index:
+                    postings = _union_postings(self.index[term], postings)
+                self.index[term] = postings
+        self._pending_docs = []
+
+    @staticmethod
+    def _group_postings(arrays: List[np.ndarray], owners: List[int]) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Agrupa os ids de token de cada documento em (token_ids, postings por token)"""
+        lengths = np.fromiter((len(a) for a in arrays), dtype=np.int64, count=len(arrays))
+        tokens = np.concatenate(arrays).astype(np.int64)
+        docs = np.repeat(np.asarray(owners, dtype=np.int64), lengths)
+        # Pares (token, doc) únicos, ordenados por token e depois por doc
+        pairs = np.unique((tokens << 32) | docs)
+        if not len(pairs):
+            return pairs, []
+        token_ids = pairs >> 32
+        bounds = np.flatnonzero(np.diff(token_ids)) + 1
+        postings = np.split((pairs & 0xFFFFFFFF).astype(np.int32), bounds)
+        return token_ids[np.r_[0, bounds]], postings
+
+    def postings_nbytes(self) -> int:
+        """Tamanho em bytes dos postings, sem serializar o índice"""
+        self.freeze()
+        if isinstance(self.index, MappedPostings):
+            return self.index.postings.nbytes
+        return sum(postings.nbytes for postings in self.index.values())
+
+    def save(self, directory: str):
+        """Salva o índice em diretório, sem pickle: arrays em arquivos binários mapeáveis e o resto em JSON"""
+        self.freeze()
+        # Cada arquivo é escrito num temporário e trocado no fim (_replacing): arrays mapeados
+        # deste ou de outros processos seguem válidos, apontando para os arquivos antigos
+        os.makedirs(directory, exist_ok=True)
+        terms = {}
+        offset = 0
+        with _replacing(os.path.join(directory, 'postings.i32')) as f:
+            for term, postings in self.index.items():
+                np.asarray(postings, dtype=np.int32).tofile(f)
+                terms[term] = [offset, len(postings)]
+                offset += len(postings)
+        with _replacing(os.path.join(directory, 'terms.json'), 'w', encoding='utf-8') as f:
+            json.dump(terms, f, ensure_ascii=False)
+
+        # Tokens codificados de cada documento, na ordem de doc_ids, concatenados com offsets int64
+        doc_ids = sorted(self.documents)
+        for name, arrays in (('tokens', self.doc_tokens), ('title_tokens', self.doc_title_tokens)):
+            chunks = [arrays[doc_id] for doc_id in doc_ids]
+            with _replacing(os.path.join(directory, f'{name}.i32')) as f:
+                np.concatenate([_EMPTY_POSTINGS] + chunks).astype(np.int32).tofile(f)
+            lengths = np.fromiter((len(tokens) for tokens in chunks), dtype=np.int64, count=len(chunks))
+            with _replacing(os.path.join(directory, f'{name}_offsets.i64')) as f:
+                np.concatenate(([0], np.cumsum(lengths))).astype(np.int64).tofile(f)
+
+        with _replacing(os.path.join(directory, 'documents.json'), 'w', encoding='utf-8') as f:
+            json.dump([self.documents[doc_id] for doc_id in doc_ids], f, ensure_ascii=False)
+        meta = {
+            'version': self.VERSION,
+            'doc_ids': doc_ids,
+            'vocab': list(self.vocab),  # a posição de cada token é o seu id
+            'norm_titles': self.norm_titles,
+        }
+        with _replacing(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        # Remove arquivos de versões anteriores do formato: o pickle, que teria precedência
+        # na carga, e os textos normalizados, que as frases não usam mais
+        for name in ('index.pkl', 'norm_texts.bin', 'norm_texts_offsets.i64'):
+            legacy_path = os.path.join(directory, name)
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+
+    @classmethod
+    def load(cls, directory: str) -> 'InvertedIndex':
+        """Carrega um índice salvo com `save`, mapeando postings e tokens em memória (np.memmap)"""
+        legacy_path = os.path.join(directory, 'index.pkl')
+        if os.path.exists(legacy_path):
+            # Diretórios salvos antes do formato JSON guardam documentos e tokens em pickle
+            with open(legacy_path, 'rb') as f:
+                state = pickle.load(f)
+            index = cls.__new__(cls)
+            index.__setstate__(state)
+        else:
+            index = cls()
+            with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(os.path.join(directory, 'documents.json'), encoding='utf-8') as f:
+                documents = json.load(f)
+            doc_ids = meta['doc_ids']
+            index.documents = dict(zip(doc_ids, documents))
+            index.vocab = {token: token_id for token_id, token in enumerate(meta['vocab'])}
+            index.norm_titles = meta['norm_titles']
+            for name, arrays in (('tokens', index.doc_tokens), ('title_tokens', index.doc_title_tokens)):
+                flat = _map_array(os.path.join(directory, f'{name}.i32'), np.int32)
+                offsets = np.fromfile(os.path.join(directory, f'{name}_offsets.i64'), dtype=np.int64)
+                arrays.update((doc_id, flat[offsets[i]:offsets[i + 1]]) for i, doc_id in enumerate(doc_ids))
+
+        with open(os.path.join(directory, 'terms.json'), encoding='utf-8') as f:
+            terms = json.load(f)
+        index.index = MappedPostings(_map_array(os.path.join(directory, 'postings.i32'), np.int32), terms)
+        return index
+
+    def score_documents(self, doc_ids: List[int], query_tokens: List[str]) -> np.ndarray:
+        """Calcula o score de relevância de cada documento para os tokens da consulta"""
+        tf_offsets, tf_ids, tf_counts, title_offsets, title_flat = self._pack_tokens()
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        query_ids = np.array([self.vocab.get(t, -1) for t in query_tokens], dtype=np.int32)
+        scores = np.zeros(len(doc_ids), dtype=np.float64)
+        if len(doc_ids) and len(query_ids):
+            _score_batch(doc_ids, tf_offsets, tf_ids, tf_counts, title_offsets, title_flat, query_ids, scores)
+        return scores
     
     def search(self, query: str) -> List[int]:
         """Busca documentos que correspondem à query"""
-        return self._parse_boolean_query(query)
+        self.freeze()
+        rpn = _to_rpn(_tokenize_query(query.strip()))
+        if rpn is None:
+            # Parênteses malformados: retorna resultado vazio por segurança
+            return []
+        return self._evaluate_rpn(rpn).tolist()
 
-    def _parse_boolean_query(self, query: str) -> List[int]:
-        """Analisa query com operadores booleanos e parênteses."""
-        query = query.strip()
-        
-        # Suporte para frases entre aspas
-        phrase_pattern = r'"([^"]+)"'
-        phrases = re.findall(phrase_pattern, query)
-        
-        # Substitui frases por placeholders para não interferir com a lógica de parênteses
-        placeholder_offset = 1000 # Evita colisão com placeholders de parênteses
-        for i, phrase in enumerate(phrases):
-            query = query.replace(f'"{phrase}"', f'__PHRASE__{i+placeholder_offset}__', 1)
-
-        sub_results = {}
-        # Armazena resultados de frases primeiro
-        for i, phrase in enumerate(phrases):
-            placeholder = f'__PHRASE__{i+placeholder_offset}__'
-            sub_results[placeholder] = set(self._search_phrase(phrase))
-
-        # Processa parênteses iterativamente, dos mais internos para os mais externos
-        placeholder_id = 0
-        while '(' in query:
-            match = re.search(r'\(([^()]+)\)', query)
-            if not match:
-                # Se não houver mais parênteses simples, pode haver um erro de aninhamento
-                # ou a query está mal formada. Retornamos um resultado vazio para segurança.
-                return [] 
-
-            sub_query = match.group(1)
-            placeholder = f'__SUB__{placeholder_id}__'
-            
-            # Avalia a subquery simples
-            result_set = self._evaluate_simple_query(sub_query, sub_results)
-            sub_results[placeholder] = result_set
-            
-            # Substitui a subquery pelo placeholder
-            query = query.replace(match.group(0), placeholder, 1)
-            placeholder_id += 1
-
-        # Avalia a query final (agora plana)
-        final_result_set = self._evaluate_simple_query(query, sub_results)
-        return list(final_result_set)
-
-    def _evaluate_simple_query(self, query: str, sub_results: Dict[str, Set[int]]) -> Set[int]:
-        """Avalia uma query booleana 'plana' (sem parênteses)."""
-        # Parse operadores OR
-        or_parts = [part.strip() for part in query.split(' OR ')]
-        
-        final_result = set()
-        
-        for or_part in or_parts:
-            if not or_part:
-                continue
-            
-            # Parse operadores AND e NOT para esta parte
-            and_result = self._parse_and_not(or_part, sub_results)
-            final_result.update(and_result)
-        
-        return final_result
+    def _evaluate_rpn(self, rpn: List[Tuple[str, str]]) -> np.ndarray:
+        """Avalia a query pós-fixa sobre os postings.
 
-    def _parse_and_not(self, query_part: str, sub_results: Dict[str, Set[int]]) -> Set[int]:
-        """Analisa parte da query com AND e NOT"""
-        parts = query_part.split()
-        positive_terms = []
-        negative_terms = []
-        
-        i = 0
-        while i < len(parts):
-            if parts[i] == 'NOT' and i + 1 < len(parts):
-                negative_terms.append(parts[i + 1])
-                i += 2
-            elif parts[i] == 'AND':
-                i += 1
-            else:
-                positive_terms.append(parts[i])
-                i += 1
-        
-        if not positive_terms:
-            return set()
-        
-        # Busca termos positivos (AND implícito)
-        result_sets = []
-        for term in positive_terms:
-            if term.startswith('__SUB__') or term.startswith('__PHRASE__'):
-                term_results = sub_results.get(term, set())
-            else:
-                term_results = set(self._search_term(term))
-            
-            result_sets.append(term_results)
-        
-        # Interseção de todos os conjuntos positivos
-        if not result_sets:
-            return set()
-            
-        result = result_sets[0].copy()
-        for result_set in result_sets[1:]:
-            result.intersection_update(result_set)
-        
-        # Remove termos negativos
-        for negative_term in negative_terms:
-            if negative_term.startswith('__SUB__') or negative_term.startswith('__PHRASE__'):
-                negative_results = sub_results.get(negative_term, set())
+        Cada valor da pilha é um par (postings positivos, postings negados) de uma
+        sequência de ANDs; ele só é resolvido em OR, no fim de um grupo ou da query.
+        """
+        stack = []
+        for kind, value in rpn:
+            if kind == 'EMPTY':
+                stack.append(([_EMPTY_POSTINGS], []))
+            elif kind == 'TERM':
+                stack.append(([self._search_term(value)], []))
+            elif kind == 'PHRASE':
+                stack.append(([self._search_phrase(value)], []))
+            elif kind == 'NOT':
+                stack.append(([], [self._resolve(stack.pop())]))
+            elif kind == 'GROUP':
+                stack.append(([self._resolve(stack.pop())], []))
             else:
-                negative_results = set(self._search_term(negative_term))
-            result.difference_update(negative_results)
+                right = stack.pop()
+                left = stack.pop()
+                if kind == 'AND':
+                    stack.append((left[0] + right[0], left[1] + right[1]))
+                else:
+                    stack.append(([_union_postings(self._resolve(left), self._resolve(right))], []))
+        if not stack:
+            return _EMPTY_POSTINGS
+        return self._resolve(stack.pop())
+
+    @staticmethod
+    def _resolve(value: Tuple[List[np.ndarray], List[np.ndarray]]) -> np.ndarray:
+        """Interseção dos postings positivos menos os negados (sem positivos, resultado vazio)"""
+        positive, negative = value
+        if not positive:
+            return _EMPTY_POSTINGS
+
+        # Interseção do posting mais curto ao mais longo: o conjunto de trabalho
+        # diminui o mais cedo possível
+        postings_lists = sorted(positive, key=len)
+        result = postings_lists[0]
+        for postings in postings_lists[1:]:
+            if not len(result):
+                return result
+            result = _intersect_postings(result, postings)
+
+        # Remove os negados (só diminuem o resultado, por isso ficam por último),
+        # do posting mais longo ao mais curto: o resultado tende a esvaziar mais cedo
+        for postings in sorted(negative, key=len, reverse=True):
+            if not len(result):
+                break
+            result = _subtract_postings(result, postings)
         
         return result
 
-    def _search_term(self, term: str) -> List[int]:
+    def _search_term(self, term: str) -> np.ndarray:
         """Busca um termo específico"""
-        normalized_term = self.processor.normalize_text(term)
-        if normalized_term in self.index:
-            return list(self.index[normalized_term])
-        return []
+        normalized_term = self.processor.normalize_term(term)
+        return self.index.get(normalized_term, _EMPTY_POSTINGS)
     
-    def _search_phrase(self, phrase: str) -> List[int]:
-        """Busca uma frase exata"""
+    def _title_sequence(self, doc_id: int) -> np.ndarray:
+        """Ids dos tokens do título em ordem, tokenizados só na primeira consulta ao documento"""
+        # doc_title_tokens guarda os ids únicos e ordenados (para a pontuação), sem a ordem original
+        sequence = self._title_sequences.get(doc_id)
+        if sequence is None:
+            sequence = np.fromiter((self.vocab[t] for t in self.processor.iter_tokens(self.norm_titles[doc_id])),
+                                   dtype=np.int32)
+            self._title_sequences[doc_id] = sequence
+        return sequence
+
+    def _phrase_positions(self, doc_id: int, phrase_ids: np.ndarray) -> np.ndarray:
+        """Posições em que a sequência de ids começa nos tokens de "titulo texto" do documento"""
+        tokens = np.concatenate((self._title_sequence(doc_id), self.doc_tokens[doc_id]))
+        if len(tokens) < len(phrase_ids):
+            return np.empty(0, dtype=np.int64)  # frase maior que o documento
+        # Começos possíveis do primeiro id, filtrados pelo id seguinte em cada deslocamento
+        positions = np.flatnonzero(tokens[:len(tokens) - len(phrase_ids) + 1] == phrase_ids[0])
+        for offset in range(1, len(phrase_ids)):
+            if not len(positions):
+                break
+            positions = positions[tokens[positions + offset] == phrase_ids[offset]]
+        return positions
+
+    def _search_phrase(self, phrase: str) -> np.ndarray:
+        """Busca uma frase exata (tokens consecutivos, ignorando stop words e palavras curtas)"""
         phrase_tokens = self.processor.tokenize(phrase)
-        if not phrase_tokens:
-            return []
+        if not phrase_tokens or any(token not in self.vocab for token in phrase_tokens):
+            return _EMPTY_POSTINGS
         
-        # Começa com documentos que contêm o primeiro token
-        # Usamos set() para garantir que a busca inicial seja em um conjunto
-        candidate_docs = set(self._search_term(phrase_tokens[0]))
+        # Candidatos: documentos com todos os tokens da frase
+        candidates = self._search_term(phrase_tokens[0])
+        for token in phrase_tokens[1:]:
+            candidates = _intersect_postings(candidates, self._search_term(token))
+        if len(phrase_tokens) == 1:
+            return candidates
         
-        # Filtra documentos que realmente contêm a frase
-        result_docs = []
-        for doc_id in candidate_docs:
-            doc = self.documents[doc_id]
-            text_content = ""
-            if 'titulo' in doc:
-                text_content += doc['titulo'] + " "
-            if 'texto' in doc and not pd.isna(doc['texto']):
-                text_content += str(doc['texto'])
-            
-            normalized_content = self.processor.normalize_text(text_content)
-            normalized_phrase = ' '.join(phrase_tokens) # Usa os tokens normalizados para a busca
-            
-            if normalized_phrase in normalized_content:
-                result_docs.append(doc_id)
+        # Confirma a ordem dos tokens pelas posições no índice direto (doc_id -> tokens)
+        phrase_ids = np.array([self.vocab[token] for token in phrase_tokens], dtype=np.int32)
+        result_docs = [doc_id for doc_id in candidates.tolist() if len(self._phrase_positions(doc_id, phrase_ids))]
         
-        return result_docs
+        return np.array(result_docs, dtype=np.int32)
+
+
+# Colunas do CSV usadas na busca e nos resultados; as demais não são carregadas
+_CSV_COLUMNS = frozenset({'titulo', 'texto', 'data_publicacao', 'link'})
+_CSV_CHUNKSIZE = 50_000
 
 
 class CNSSearchEngine:
@@ -257,104 +878,149 @@ class CNSSearchEngine:
         self.index = InvertedIndex()
         self.processor = TextProcessor()
         self.csv_path = csv_path
-        self.index_path = 'cns_search_index.pkl'
+        self.index_path = 'cns_search_index.pkl'  # formato antigo, um único pickle
+        self.index_dir = 'cns_search_index'
+        # Resultados recentes por (query, max_results); o índice não muda entre cargas
+        self._cached_search = lru_cache(maxsize=512)(self._search)
+        self._cached_match = lru_cache(maxsize=512)(self._match)
+        # Snippets por (doc_id, tokens da consulta): páginas seguintes reaproveitam os anteriores
+        self._cached_snippet = lru_cache(maxsize=8192)(self._snippet)
         
-    def load_data(self, csv_path: str = None):
-        """Carrega dados do CSV"""
+    def load_data(self, csv_path: str = None, workers: int = 1):
+        """Carrega dados do CSV (workers > 1 normaliza os textos em vários processos)"""
         if csv_path:
             self.csv_path = csv_path
         
-        print("Carregando dados...")
-        df = pd.read_csv(self.csv_path)
-        print(f"Dados carregados: {len(df)} documentos")
-        
-        # Adiciona documentos ao índice
-        print("Criando índice...")
-        for idx, row in df.iterrows():
-            self.index.add_document(idx, row.to_dict())
+        print("Carregando dados e criando índice...")
+        # Lê o CSV em blocos, só com as colunas usadas, para limitar o pico de memória;
+        # células vazias viram '' (e não NaN) nos documentos
+        reader = pd.read_csv(self.csv_path, usecols=lambda column: column in _CSV_COLUMNS,
+                             dtype=str, na_filter=False, chunksize=_CSV_CHUNKSIZE)
+        total = 0
+        for chunk in reader:
+            # O índice do bloco continua a numeração do anterior: doc_id = número da linha
+            self.index.bulk_add(chunk, workers=workers)
+            total += len(chunk)
+        print(f"Dados carregados: {total} documentos")
+        self._clear_caches()
         
         print("Índice criado com sucesso!")
-        return len(df)
+        return total
     
     def save_index(self):
         """Salva o índice em arquivo"""
-        with open(self.index_path, 'wb') as f:
-            pickle.dump(self.index, f)
-        print(f"Índice salvo em {self.index_path}")
+        self.index.save(self.index_dir)
+        print(f"Índice salvo em {self.index_dir}")
     
     def load_index(self):
         """Carrega o índice de arquivo"""
-        if os.path.exists(self.index_path):
+        if os.path.isdir(self.index_dir):
+            self.index = InvertedIndex.load(self.index_dir)
+            print(f"Índice carregado de {self.index_dir}")
+            if os.path.exists(os.path.join(self.index_dir, 'index.pkl')):
+                # Diretório no formato anterior (pickle): regrava no formato atual
+                try:
+                    self.save_index()
+                except OSError as e:
+                    print(f"Não foi possível converter o índice: {e}")
+        elif os.path.exists(self.index_path):
             with open(self.index_path, 'rb') as f:
                 self.index = pickle.load(f)
             print(f"Índice carregado de {self.index_path}")
-            return True
-        return False
+            # Converte para o formato mapeado para que as próximas cargas sejam rápidas
+            try:
+                self.save_index()
+            except OSError as e:
+                print(f"Não foi possível converter o índice: {e}")
+        else:
+            return False
+
+        self._clear_caches()
+        # Compila a pontuação (numba) agora em vez de na primeira busca
+        if self.index.documents:
+            self.index.score_documents([next(iter(self.index.documents))], ['saude'])
+        return True
     
+    def _clear_caches(self):
+        """Descarta resultados em cache (o índice mudou)"""
+        self._cached_search.cache_clear()
+        self._cached_match.cache_clear()
+        self._cached_snippet.cache_clear()
+
+    def count(self, query: str) -> int:
+        """Conta os documentos que atendem à query, sem pontuar nem extrair snippets"""
+        query = ' '.join(query.split())
+        if not query:
+            return 0
+        return len(self._cached_match(query))
+
+    def _match(self, query: str) -> Tuple[int, ...]:
+        """Ids dos documentos que atendem à query (ordem crescente)"""
+        # Só stop words e palavras curtas: nenhum termo ou frase pode estar no índice,
+        # então nem passa pelo parser (consultas longas como "a a a ..." saem aqui)
+        if not self.processor.tokenize(query):
+            return ()
+        return tuple(self.index.search(query))
+
     def search(self, query: str, max_results: int = 20) -> List[SearchResult]:
         """Realiza busca e retorna resultados ordenados"""
-        if not query.strip():
+        # Espaços extras não mudam a query; caixa e aspas sim (operadores, frases)
+        query = ' '.join(query.split())
+        if not query:
             return []
-        
+        return list(self._cached_search(query, max_results))
+
+    def _search(self, query: str, max_results: int) -> Tuple[SearchResult, ...]:
+        """Executa a busca sem cache"""
         # Busca no índice
-        doc_ids = self.index.search(query)
+        doc_ids = self._cached_match(query)
         
         if not doc_ids:
-            return []
+            return ()
         
-        # Calcula scores e prepara resultados
+        # Pontua todos os candidatos e só então escolhe os melhores
         query_tokens = self.processor.tokenize(query)
-        results = []
+        scores = self.index.score_documents(doc_ids, query_tokens)
+        top = _top_k(scores, max_results)
         
-        for doc_id in doc_ids[:max_results]:
+        # Snippets (a etapa mais cara) apenas para os resultados que serão retornados
+        query_tokens = tuple(query_tokens)
+        results = []
+        for position in top.tolist():
+            doc_id = doc_ids[position]
+            score = scores[position]
             doc = self.index.documents[doc_id]
-            score = self._calculate_score(doc, query_tokens)
             
-            snippet = self.processor.extract_snippet(
-                str(doc.get('texto', '')), 
-                query_tokens
-            )
+            snippet = self._cached_snippet(doc_id, query_tokens)
             
             result = SearchResult(
                 id=doc_id,
                 titulo=doc.get('titulo', ''),
-                score=score,
+                score=float(score),
                 snippet=snippet,
                 data_publicacao=doc.get('data_publicacao', ''),
                 link=doc.get('link', '')
             )
             results.append(result)
         
-        # Ordena por score decrescente
-        results.sort(key=lambda x: x.score, reverse=True)
-        return results[:max_results]
-    
-    def _calculate_score(self, document: Dict, query_tokens: List[str]) -> float:
-        """Calcula score de relevância do documento"""
-        score = 0.0
-        
-        # Score baseado no título (peso maior)
-        if 'titulo' in document:
-            title_tokens = set(self.processor.tokenize(document['titulo']))
-            for token in query_tokens:
-                if token in title_tokens:
-                    score += 3.0
-        
-        # Score baseado no texto do PDF
-        if 'texto' in document and not pd.isna(document['texto']):
-            pdf_tokens = self.processor.tokenize(str(document['texto']))
-            for token in query_tokens:
-                count = pdf_tokens.count(token)
-                score += count * 1.0
-        
-        return score
+        return tuple(results)
+
+    def _snippet(self, doc_id: int, query_tokens: Tuple[str, ...]) -> str:
+        """Extrai o snippet do documento para os tokens da consulta (sem cache)"""
+        return self.processor.extract_snippet(
+            str(self.index.documents[doc_id].get('texto', '')),
+            list(query_tokens)
+        )
     
     def get_stats(self) -> Dict:
         """Retorna estatísticas do índice"""
+        cache = self._cached_search.cache_info()
         return {
             'total_documents': len(self.index.documents),
             'total_unique_terms': len(self.index.index),
-            'index_size_mb': len(str(self.index)) / (1024 * 1024)
+            'index_size_mb': self.index.postings_nbytes() / (1024 * 1024),
+            'cache_hits': cache.hits,
+            'cache_misses': cache.misses
         }
 
 
@@ -47,6 +47,12 @@ class TestSearchOperators(unittest.TestCase):
         if len(results_all) > 0:
             self.assertLessEqual(len(results_not), len(results_all))
 
+    def test_or_operator_irregular_whitespace(self):
+        expected = sorted(self.engine.index.search("medicina OR enfermagem"))
+        
+        self.assertEqual(sorted(self.engine.index.search("medicina\tOR\tenfermagem")), expected)
+        self.assertEqual(sorted(self.engine.index.search("medicina   OR  enfermagem")), expected)
+
     def test_simple_parentheses(self):
         results_with_parens = self.engine.search("(conselho AND nacional)")
         results_without_parens = self.engine.search("conselho AND nacional")
@@ -82,6 +88,21 @@ class TestSearchOperators(unittest.TestCase):
         results = self.engine.search('"saúde pública"')
         self.assertGreaterEqual(len(results), 0)
 
+    def test_phrase_ignores_stopwords(self):
+        results_with_stopword = self.engine.search('"conselho nacional de saúde"', max_results=10000)
+        results_without_stopword = self.engine.search('"conselho nacional saúde"', max_results=10000)
+        results_and = self.engine.search('conselho AND nacional AND saúde', max_results=10000)
+
+        self.assertEqual(results_with_stopword, results_without_stopword)
+        self.assertLessEqual({r.id for r in results_with_stopword}, {r.id for r in results_and})
+
+    def test_phrase_longer_than_document(self):
+        engine = CNSSearchEngine()
+        engine.index.add_document(0, {'titulo': 'Saúde', 'texto': 'saúde'})
+
+        self.assertEqual([r.id for r in engine.search('"saúde saúde"')], [0])
+        self.assertEqual(engine.search('"saúde saúde saúde saúde"'), [])
+
     def test_phrase_with_parentheses(self):
         results = self.engine.search('("conselho nacional" OR medicina)')
         self.assertGreaterEqual(len(results), 0)
@@ -124,6 +145,10 @@ class TestSearchOperators(unittest.TestCase):
         results = self.engine.search("AND OR NOT")
         self.assertGreaterEqual(len(results), 0)
 
+    def test_stopwords_only_query(self):
+        self.assertEqual(self.engine.search('de "da" (do OR para)'), [])
+        self.assertEqual(self.engine.count("a " * 10000), 0)
+
     def test_unclosed_quotes(self):
         results = self.engine.search('"saúde mental')
         titles = [r.titulo for r in results if r.titulo]
@@ -158,6 +183,12 @@ class TestSearchOperators(unittest.TestCase):
         self.assertGreaterEqual(len(results1), 0)
         self.assertGreaterEqual(len(results2), 0)
 
+    def test_and_binds_tighter_than_or(self):
+        results1 = self.engine.search("saúde AND mental OR medicina", max_results=10000)
+        results2 = self.engine.search("(saúde AND mental) OR medicina", max_results=10000)
+        
+        self.assertEqual([r.id for r in results1], [r.id for r in results2])
+
     def test_score_calculation(self):
         results = self.engine.search("saúde")
         self.assertTrue(all(r.score > 0 for r in results))
@@ -176,6 +207,28 @@ class TestSearchOperators(unittest.TestCase):
         results = self.engine.search("saúde", max_results=3)
         self.assertLessEqual(len(results), 3)
 
+    def test_repeated_query_uses_cache(self):
+        first = self.engine.search("conselho  nacional", max_results=5)
+        hits = self.engine._cached_search.cache_info().hits
+        second = self.engine.search(" conselho nacional ", max_results=5)
+        
+        self.assertEqual(first, second)
+        self.assertEqual(self.engine._cached_search.cache_info().hits, hits + 1)
+
+    def test_max_results_keeps_best_scores(self):
+        all_results = self.engine.search("saúde mental", max_results=10000)
+        top_results = self.engine.search("saúde mental", max_results=5)
+        
+        self.assertEqual([r.id for r in top_results], [r.id for r in all_results[:5]])
+
+    def test_next_page_reuses_snippets(self):
+        first_page = self.engine.search("pesquisa clínica", max_results=5)
+        hits = self.engine._cached_snippet.cache_info().hits
+        two_pages = self.engine.search("pesquisa clínica", max_results=10)
+
+        self.assertEqual(two_pages[:5], first_page)
+        self.assertEqual(self.engine._cached_snippet.cache_info().hits, hits + len(first_page))
+
     def test_document_fields_in_results(self):
         results = self.engine.search("saúde")
         for result in results:
@@ -1,8 +1,34 @@
+"""
+Interface web Flask do buscador CNS
+
+O índice é carregado ao importar o módulo (create_app()), então `app` já
+serve buscas com `gunicorn web_interface:app` ou `flask --app web_interface run`.
+
+Produção (gunicorn): com `--preload` o mestre importa o módulo, e carrega o
+índice, uma única vez antes do fork; os workers o compartilham (copy-on-write):
+
+    gunicorn -w 4 --preload -b 0.0.0.0:5000 web_interface:app
+
+- Postings e tokens ficam em arquivos mapeados (np.memmap): as páginas são do
+  page cache do sistema, compartilhadas entre os workers, e não memória anônima
+  que o copy-on-write duplicaria.
+- O kernel numba de pontuação é serial, sem pool de threads próprio: é seguro
+  depois do fork e chamado de várias threads ao mesmo tempo.
+- Depois de carregado o índice é só leitura: as buscas não precisam de lock
+  (os caches são lru_cache, seguros entre threads).
+- O servidor de desenvolvimento (python3 web_interface.py) roda sem o modo
+  debug do Werkzeug, que expõe um console remoto; ative com FLASK_DEBUG=1.
+"""
+
 from flask import Flask, render_template, request, jsonify, Response
 import os
 import sys
-import pandas as pd
+import csv
 import io
+import re
+import unicodedata
+import hashlib
+from functools import lru_cache
 
 # Adiciona o diretório atual ao path para importar search_engine
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -11,26 +37,50 @@ from search_engine import CNSSearchEngine
 
 app = Flask(__name__)
 
-# Inicializa o motor de busca
-search_engine = CNSSearchEngine()
+# Tudo que não é letra ASCII, dígito, '-' ou '_' vira '_' no nome do arquivo baixado
+_FILENAME_UNSAFE_RE = re.compile(r'[^A-Za-z0-9_-]+')
+# Limite de resultados por requisição (busca e CSV), para limitar memória e tempo
+_MAX_RESULTS = 1000
 
-# Carrega o índice ou cria um novo
+# Motor de busca compartilhado pelas rotas; o índice é carregado em create_app(), logo abaixo
+search_engine = CNSSearchEngine()
 csv_path = os.path.join(os.path.dirname(__file__), '..', 'cns_resolucoes_com_textos_20250818_132004.csv')
-if not search_engine.load_index():
-    print("Criando novo índice...")
-    search_engine.load_data(csv_path)
-    search_engine.save_index()
+
+def create_app() -> Flask:
+    """Carrega o índice (ou o cria a partir do CSV) e retorna o app pronto para servir"""
+    if search_engine.index.documents:
+        return app  # já carregado
+    if not search_engine.load_index():
+        print("Criando novo índice...")
+        search_engine.load_data(csv_path)
+        search_engine.save_index()
+        # Recarrega do disco: os workers passam a compartilhar os arquivos mapeados
+        search_engine.load_index()
+    return app
+
+create_app()
+
+@lru_cache(maxsize=1)
+def _index_page():
+    """Renderiza a página principal uma única vez: o template é estático (html, etag)"""
+    html = render_template('index.html')
+    return html, hashlib.sha1(html.encode('utf-8')).hexdigest()
 
 @app.route('/')
 def index():
     """Página principal"""
-    return render_template('index.html')
+    html, etag = _index_page()
+    response = Response(html, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=300'
+    # Responde 304 quando o navegador já tem a página (If-None-Match)
+    return response.make_conditional(request)
 
 @app.route('/search')
 def search():
     """Endpoint de busca"""
     query = request.args.get('q', '').strip()
-    max_results = int(request.args.get('limit', 20))
+    max_results = min(max(request.args.get('limit', 20, type=int), 1), _MAX_RESULTS)
     
     if not query:
         return jsonify({'results': [], 'query': '', 'total': 0})
@@ -50,11 +100,14 @@ def search():
                 'link': result.link
             })
         
-        return jsonify({
+        response = jsonify({
             'results': results_json,
             'query': query,
             'total': len(results_json)
         })
+        # O índice não muda enquanto o servidor roda
+        response.headers['Cache-Control'] = 'public, max-age=60'
+        return response
     
     except Exception as e:
         return jsonify({
@@ -77,7 +130,7 @@ def stats():
 def download_csv():
     """Endpoint para download dos resultados em CSV"""
     query = request.args.get('q', '').strip()
-    max_results = int(request.args.get('limit', 100))
+    max_results = min(max(request.args.get('limit', 100, type=int), 1), _MAX_RESULTS)
     
     if not query:
         return jsonify({'error': 'Query não fornecida'}), 400
@@ -88,29 +141,25 @@ def download_csv():
         if not results:
             return jsonify({'error': 'Nenhum resultado encontrado'}), 404
         
-        # Converte resultados para DataFrame
-        data = []
-        for result in results:
-            data.append({
-                'Título': result.titulo,
-                'Data de Publicação': result.data_publicacao,
-                'Link': result.link,
-                'Trecho': result.snippet
-            })
-        
-        df = pd.DataFrame(data)
-        
-        # Cria CSV em memória
-        output = io.StringIO()
-        df.to_csv(output, index=False, encoding='utf-8-sig')
-        output.seek(0)
+        def csv_rows():
+            """Gera o CSV linha a linha, sem montar o arquivo inteiro em memória"""
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            yield '\ufeff'  # BOM para o Excel reconhecer UTF-8
+            writer.writerow(['Título', 'Data de Publicação', 'Link', 'Trecho'])
+            for result in results:
+                writer.writerow([result.titulo, result.data_publicacao, result.link, result.snippet])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
         
-        # Nome do arquivo baseado na query - remove caracteres problemáticos
-        safe_query = query.replace(' ', '_').replace('"', '').replace("'", '').replace('/', '').replace('\\', '').replace(':', '').replace('*', '').replace('?', '').replace('<', '').replace('>', '').replace('|', '')[:30]
+        # Nome do arquivo baseado na query: sem acentos e só com caracteres seguros
+        ascii_query = unicodedata.normalize('NFKD', query).encode('ascii', 'ignore').decode('ascii')
+        safe_query = _FILENAME_UNSAFE_RE.sub('_', ascii_query).strip('_')[:30]
         filename = f"resultados_busca_{safe_query}.csv"
         
         return Response(
-            output.getvalue(),
+            csv_rows(),
             mimetype='text/csv',
             headers={
                 'Content-Disposition': f'attachment; filename="{filename}"',
@@ -129,4 +178,4 @@ if __name__ == '__main__':
     
     print("Iniciando servidor web...")
     print("Acesse: http://localhost:5000")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    create_app().run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
\ No newline at end of file